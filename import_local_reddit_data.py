@@ -28,6 +28,12 @@ By default, it will skip any file that already has a ".done" marker. Remove
 --skip-done if you want to reimport.
 
 You can also omit --user/--password if your ~/.my.cnf handles credentials.
+
+Pass --thread-index to also build a com_YYYY_MM_threads side table while
+importing RC_YYYY-MM.zst comments. It stores base36-decoded integer ids
+(comment, link, parent) plus each comment's depth and direct reply count, so
+reply trees can be walked with indexed integer lookups instead of recursive
+self-joins.
 """
 
 import os
@@ -37,6 +43,8 @@ import argparse
 import subprocess
 import json
 import datetime
+from array import array
+from collections import Counter
 import pymysql
 
 # ---------------------------------------------------------------------------
@@ -95,6 +103,226 @@ def create_table_if_needed(cursor, table_name, is_comment):
         """
     cursor.execute(create_sql)
 
+# ---------------------------------------------------------------------------
+#                      THREAD INDEX (optional, comments only)
+# ---------------------------------------------------------------------------
+
+# Parent markers. Real ids are >= 0, so negative values can't collide.
+TOP_LEVEL = -1       # comment replies directly to the submission
+UNKNOWN_PARENT = -2  # parent_id missing or unparseable
+MAX_ID = 2**63 - 1   # largest id an array('q') slot can hold
+
+def base36_id(fullname):
+    """
+    Converts a Reddit id such as 't3_abc12' or 'abc12' to its integer value.
+    Returns None if it can't be parsed or doesn't fit in a signed 64-bit
+    integer (the thread index stores ids in array('q')).
+
+    >>> base36_id("t3_z")
+    35
+    >>> base36_id("10")
+    36
+    >>> base36_id("t1_0")
+    0
+    >>> base36_id("t1_!") is None, base36_id(None) is None
+    (True, True)
+    >>> [base36_id(s) for s in ("t1_-1", " 1", "t1_a_b", "A")]
+    [None, None, None, None]
+    >>> base36_id("t1_" + "z" * 13) is None
+    True
+    """
+    if not fullname or not isinstance(fullname, str):
+        return None
+    if "_" in fullname:
+        fullname = fullname.split("_", 1)[1]
+    # int(s, 36) also accepts signs, whitespace and '_' separators.
+    if not re.fullmatch(r'[0-9a-z]+', fullname):
+        return None
+    value = int(fullname, 36)
+    if value > MAX_ID:
+        return None
+    return value
+
+def add_to_thread_index(index, data):
+    """
+    Records one comment in the thread index.
+
+    The index maps link (submission) id -> array('q') of interleaved
+    (comment_id, parent_id) pairs, so each comment costs 16 bytes instead of
+    a full Python tuple. parent_id is TOP_LEVEL for replies to the submission
+    and UNKNOWN_PARENT if it can't be parsed.
+    """
+    comment_id = base36_id(data.get("id"))
+    link_id = base36_id(data.get("link_id"))
+    if comment_id is None or link_id is None:
+        return
+
+    parent = data.get("parent_id")
+    if isinstance(parent, str) and parent.startswith("t3_"):
+        parent_id = TOP_LEVEL
+    else:
+        parent_id = base36_id(parent)
+        if parent_id is None:
+            parent_id = UNKNOWN_PARENT
+
+    pairs = index.get(link_id)
+    if pairs is None:
+        pairs = index[link_id] = array('q')
+    pairs.append(comment_id)
+    pairs.append(parent_id)
+
+def iter_thread_rows(index):
+    """
+    Yields (comment_id, link_id, parent_id, depth, child_count) for every
+    comment in the index, one link_id at a time. Each link_id is removed
+    from the index as it is processed, so memory drops while rows are
+    written; the index is empty once the generator is exhausted.
+
+    depth is 0 for top-level comments. It is None when the chain of parents
+    leaves this file (e.g. the parent was posted in an earlier month), since
+    the true depth can't be known from this file alone, or when the chain
+    loops back on itself (corrupt data). child_count only
+    counts replies present in this file.
+
+    parent_id is None for top-level comments (depth 0) and for comments whose
+    parent_id couldn't be parsed (depth None).
+
+    Submission 'z' (35): 'a' is top level, 'b' replies to 'a', 'c' to 'b'.
+    'd' replies to 'q', which isn't in this file, 'e' has no parent_id,
+    and 'x' is its own parent.
+
+    >>> index = {}
+    >>> for cid, parent in [("a", "t3_z"), ("b", "t1_a"), ("c", "t1_b"),
+    ...                     ("d", "t1_q"), ("e", None), ("x", "t1_x")]:
+    ...     add_to_thread_index(index, {"id": cid, "link_id": "t3_z", "parent_id": parent})
+    >>> for row in iter_thread_rows(index):
+    ...     print(row)
+    (10, 35, None, 0, 1)
+    (11, 35, 10, 1, 1)
+    (12, 35, 11, 2, 0)
+    (13, 35, 26, None, 0)
+    (14, 35, None, None, 0)
+    (33, 35, 33, None, 0)
+    >>> index
+    {}
+
+    A parent id too large for array('q') is treated as unparseable, so the
+    pair stays aligned.
+
+    >>> index = {}
+    >>> add_to_thread_index(index, {"id": "a", "link_id": "t3_z", "parent_id": "t1_" + "z" * 13})
+    >>> list(iter_thread_rows(index))
+    [(10, 35, None, None, 0)]
+    """
+    while index:
+        link_id, pairs = index.popitem()
+        parents = dict(zip(pairs[0::2], pairs[1::2]))
+        del pairs
+        child_counts = Counter(
+            parent_id for comment_id, parent_id in parents.items()
+            if parent_id != comment_id
+        )
+        depths = {}
+
+        for comment_id in parents:
+            # Walk up until we hit a comment with a known depth, the
+            # submission, a parent we never saw, or a cycle in bad data.
+            path = []
+            seen = set()
+            node = comment_id
+            while node not in depths:
+                path.append(node)
+                seen.add(node)
+                parent_id = parents[node]
+                if parent_id == TOP_LEVEL:
+                    depth = -1
+                    break
+                if parent_id not in parents or parent_id in seen:
+                    depth = None
+                    break
+                node = parent_id
+            else:
+                depth = depths[node]
+
+            for node in reversed(path):
+                if depth is not None:
+                    depth += 1
+                depths[node] = depth
+
+        for comment_id, parent_id in parents.items():
+            yield (
+                comment_id,
+                link_id,
+                parent_id if parent_id >= 0 else None,
+                depths[comment_id],
+                child_counts.get(comment_id, 0),
+            )
+
+def create_thread_table_if_needed(cursor, table_name):
+    """
+    Create the side table holding the integer-keyed thread index.
+    message_id is the base36 string, kept so rows join back to the main table.
+    """
+    create_sql = f"""
+    CREATE TABLE IF NOT EXISTS `{table_name}` (
+      `comment_id` BIGINT UNSIGNED PRIMARY KEY,
+      `message_id` VARCHAR(20),
+      `link_id` BIGINT UNSIGNED NOT NULL,
+      `parent_id` BIGINT UNSIGNED NULL,
+      `depth` INT NULL,
+      `child_count` INT NOT NULL DEFAULT 0,
+      INDEX(message_id),
+      INDEX(link_id),
+      INDEX(parent_id)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+    """
+    cursor.execute(create_sql)
+
+def to_base36(n):
+    """
+    Inverse of base36_id() for non-negative integers (no type prefix).
+    """
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    if n == 0:
+        return "0"
+    out = []
+    while n:
+        n, r = divmod(n, 36)
+        out.append(digits[r])
+    return "".join(reversed(out))
+
+def write_thread_index(conn, cur, table_name, index):
+    """
+    Writes the thread index to `table_name` in chunks. Uses REPLACE so a
+    re-import refreshes existing rows. Returns the number of rows written.
+    """
+    create_thread_table_if_needed(cur, table_name)
+    conn.commit()
+
+    insert_sql = f"""
+    REPLACE INTO `{table_name}`
+    (comment_id, message_id, link_id, parent_id, depth, child_count)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    """
+
+    chunk = []
+    row_count = 0
+    for comment_id, link_id, parent_id, depth, child_count in iter_thread_rows(index):
+        chunk.append((comment_id, to_base36(comment_id), link_id, parent_id, depth, child_count))
+        if len(chunk) >= CHUNK_SIZE:
+            cur.executemany(insert_sql, chunk)
+            conn.commit()
+            row_count += len(chunk)
+            chunk = []
+
+    # leftover
+    if chunk:
+        cur.executemany(insert_sql, chunk)
+        conn.commit()
+        row_count += len(chunk)
+
+    return row_count
+
 # ---------------------------------------------------------------------------
 #                      MAIN IMPORT LOGIC
 # ---------------------------------------------------------------------------
@@ -171,12 +399,14 @@ def import_zst_file(zst_path, args):
       - If file name matches RC_YYYY-MM.zst => comments
       - If file name matches RS_YYYY-MM.zst => submissions
     Decompress line-by-line, parse JSON, insert in chunks.
+
+    With --skip-done and --thread-index, a comment file that already has a
+    .done marker but no .threads.done marker is streamed again to build only
+    the thread index; the main table is left untouched.
     """
     base_name = os.path.basename(zst_path)
     done_file = zst_path + ".done"
-    if args.skip_done and os.path.exists(done_file):
-        print(f"  -> {done_file} exists, skipping re-import.")
-        return
+    threads_done_file = zst_path + ".threads.done"
 
     # Patterns: RC_YYYY-MM.zst or RS_YYYY-MM.zst
     m = re.match(r'^(RC|RS)_(\d{4})-(\d{2})\.zst$', base_name)
@@ -187,14 +417,25 @@ def import_zst_file(zst_path, args):
     prefix, year_str, month_str = m.groups()
     table_name = f"{'com' if prefix=='RC' else 'sub'}_{year_str}_{month_str}"
     is_comment = (prefix == "RC")
+    want_threads = is_comment and args.thread_index
+
+    index_only = False
+    if args.skip_done and os.path.exists(done_file):
+        if want_threads and not os.path.exists(threads_done_file):
+            print(f"  -> {done_file} exists, building thread index only.")
+            index_only = True
+        else:
+            print(f"  -> {done_file} exists, skipping re-import.")
+            return
 
     print(f"[INFO] Parsing {zst_path} => Table: {table_name}")
     conn = get_sql_connection(args)
     cur = conn.cursor()
 
     # Create table if needed
-    create_table_if_needed(cur, table_name, is_comment=is_comment)
-    conn.commit()
+    if not index_only:
+        create_table_if_needed(cur, table_name, is_comment=is_comment)
+        conn.commit()
 
     # Our insert statement
     insert_sql = f"""
@@ -210,6 +451,7 @@ def import_zst_file(zst_path, args):
 
     chunk = []
     row_count = 0
+    thread_index = {} if want_threads else None
 
     for line in proc.stdout:
         try:
@@ -217,6 +459,11 @@ def import_zst_file(zst_path, args):
         except json.JSONDecodeError:
             continue
 
+        if thread_index is not None:
+            add_to_thread_index(thread_index, data)
+        if index_only:
+            continue
+
         # Extract fields
         if is_comment:
             msg_id = data.get("id")
@@ -253,15 +500,32 @@ def import_zst_file(zst_path, args):
     proc.stdout.close()
     proc.wait()
 
+    # Only write the thread index from a complete stream; depths and child
+    # counts from a truncated file would overwrite rows from a good run.
+    thread_table = f"{table_name}_threads"
+    thread_rows = None
+    if thread_index is not None and proc.returncode == 0:
+        # In index-only mode the connection sat idle for the whole stream and
+        # may have passed wait_timeout.
+        conn.ping(reconnect=True)
+        thread_rows = write_thread_index(conn, cur, thread_table, thread_index)
+
     cur.close()
     conn.close()
 
     if proc.returncode == 0:
-        print(f"[INFO] Inserted ~{row_count} rows into {table_name}")
-        with open(done_file, "w") as f:
-            f.write("done\n")
+        if not index_only:
+            print(f"[INFO] Inserted ~{row_count} rows into {table_name}")
+            with open(done_file, "w") as f:
+                f.write("done\n")
+        if thread_rows is not None:
+            print(f"[INFO] Wrote {thread_rows} thread index rows into {thread_table}")
+            with open(threads_done_file, "w") as f:
+                f.write("done\n")
     else:
         print(f"[ERROR] zstd exit code={proc.returncode}. Some data may have been inserted.")
+        if thread_index is not None:
+            print(f"[WARN] Skipped thread index for {table_name}; {thread_table} was not updated.")
 
 
 # ---------------------------------------------------------------------------
@@ -307,6 +571,8 @@ def main():
     parser.add_argument("--user", default=None, help="MySQL user (omit if relying on ~/.my.cnf).")
     parser.add_argument("--password", default=None, help="MySQL password (omit if using ~/.my.cnf).")
     parser.add_argument("--skip-done", action="store_true", help="Skip files that have a .done marker.")
+    parser.add_argument("--thread-index", action="store_true",
+                        help="For RC_*.zst comments, also build a <table>_threads side table (root, parent, depth, child count).")
     args = parser.parse_args()
 
     print(f"[INFO] Scanning directory: {args.data_dir}")